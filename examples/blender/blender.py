@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
+import asyncio
+import json
 import pathlib
 import sys
+import time
 from datetime import datetime, timedelta
 
 from yapapi import Golem, Task, WorkContext
 from yapapi.payload import vm
 from yapapi.rest.activity import BatchTimeoutError
 
-examples_dir = pathlib.Path(__file__).resolve().parent.parent
-sys.path.append(str(examples_dir))
+examples_dir = str(pathlib.Path(__file__).resolve().parent.parent)
+if examples_dir not in sys.path:
+    sys.path.append(examples_dir)
 
 from utils import (
     TEXT_COLOR_CYAN,
@@ -21,9 +25,17 @@ from utils import (
     run_golem_example,
 )
 
+# resolved once at import time rather than on every worker spawn
+SCENE_PATH = str(pathlib.Path(__file__).resolve().parent / "cubes.blend")
+
 
 async def main(
-    subnet_tag, min_cpu_threads, payment_driver=None, payment_network=None, show_usage=False
+    subnet_tag,
+    min_cpu_threads,
+    max_workers,
+    payment_driver=None,
+    payment_network=None,
+    show_usage=False,
 ):
     package = await vm.repo(
         image_hash="9a3b5d67b0b27746283cb5f287c13eab1beaa12d92a9f536b747c7ae",
@@ -36,39 +48,47 @@ async def main(
         min_cpu_threads=min_cpu_threads,
     )
 
-    async def worker(ctx: WorkContext, tasks):
-        script_dir = pathlib.Path(__file__).resolve().parent
-        scene_path = str(script_dir / "cubes.blend")
+    # Everything in the render parameters except the frame number is constant for the
+    # whole run, so serialize them once up front and substitute the frame number into
+    # the encoded JSON instead of re-serializing the whole dict for every task.
+    params_template = json.dumps(
+        {
+            "scene_file": "/golem/resource/scene.blend",
+            "resolution": (400, 300),
+            "use_compositing": False,
+            "crops": [{"outfilebasename": "out", "borders_x": [0.0, 1.0], "borders_y": [0.0, 1.0]}],
+            "samples": 100,
+            "frames": ["__FRAME__"],
+            "output_format": "PNG",
+            "RESOURCES_DIR": "/golem/resources",
+            "WORK_DIR": "/golem/work",
+            "OUTPUT_DIR": "/golem/output",
+        }
+    )
 
-        # Set timeout for the first script executed on the provider. Usually, 30 seconds
-        # should be more than enough for computing a single frame of the provided scene,
-        # however a provider may require more time for the first task if it needs to download
-        # the VM image first. Once downloaded, the VM image will be cached and other tasks that use
-        # that image will be computed faster.
-        script = ctx.new_script(timeout=timedelta(minutes=10))
-        script.upload_file(scene_path, "/golem/resource/scene.blend")
+    async def worker(ctx: WorkContext, tasks):
+        # Whether the scene file has already been uploaded to this provider. It only needs
+        # to be transferred once per activity and is then reused by subsequent tasks.
+        scene_uploaded = False
 
         async for task in tasks:
             frame = task.data
-            crops = [{"outfilebasename": "out", "borders_x": [0.0, 1.0], "borders_y": [0.0, 1.0]}]
-            script.upload_json(
-                {
-                    "scene_file": "/golem/resource/scene.blend",
-                    "resolution": (400, 300),
-                    "use_compositing": False,
-                    "crops": crops,
-                    "samples": 100,
-                    "frames": [frame],
-                    "output_format": "PNG",
-                    "RESOURCES_DIR": "/golem/resources",
-                    "WORK_DIR": "/golem/work",
-                    "OUTPUT_DIR": "/golem/output",
-                },
-                "/golem/work/params.json",
-            )
+            output_file = f"output_{frame}.png"
+            params = params_template.replace('"__FRAME__"', str(frame))
+
+            # All commands for a single frame are batched into one script, so each task
+            # costs a single round-trip to the provider. Usually, 30 seconds should be more
+            # than enough for computing a single frame of the provided scene, however
+            # a provider may require more time for the first task if it needs to download
+            # the VM image and the scene file first. Once downloaded, both will be cached
+            # and other tasks that use them will be computed faster.
+            script = ctx.new_script(timeout=timedelta(minutes=10 if not scene_uploaded else 1))
+            if not scene_uploaded:
+                script.upload_file(SCENE_PATH, "/golem/resource/scene.blend")
+                scene_uploaded = True
+            script.upload_bytes(params.encode(), "/golem/work/params.json")
 
             script.run("/golem/entrypoints/run-blender.sh")
-            output_file = f"output_{frame}.png"
             script.download_file(f"/golem/output/out{frame:04d}.png", output_file)
             try:
                 yield script
@@ -83,13 +103,12 @@ async def main(
                 )
                 raise
 
-            # reinitialize the script which we send to the engine to compute subsequent frames
-            script = ctx.new_script(timeout=timedelta(minutes=1))
-
             if show_usage:
-                raw_state = await ctx.get_raw_state()
-                usage = format_usage(await ctx.get_usage())
-                cost = await ctx.get_cost()
+                # the three queries are independent, so issue them concurrently
+                raw_state, usage, cost = await asyncio.gather(
+                    ctx.get_raw_state(), ctx.get_usage(), ctx.get_cost()
+                )
+                usage = format_usage(usage)
                 print(
                     f"{TEXT_COLOR_MAGENTA}"
                     f" --- {ctx.provider_name} STATE: {raw_state}\n"
@@ -119,13 +138,19 @@ async def main(
         print_env_info(golem)
 
         num_tasks = 0
-        start_time = datetime.now()
+        start_time = time.monotonic()
+
+        async def frame_source():
+            # Tasks are produced lazily, one per frame; a producer written this way can
+            # keep emitting new frames while earlier ones are already being rendered.
+            for frame in frames:
+                yield Task(data=frame)
 
         completed_tasks = golem.execute_tasks(
             worker,
-            [Task(data=frame) for frame in frames],
+            frame_source(),
             payload=package,
-            max_workers=3,
+            max_workers=max_workers,
             timeout=timeout,
         )
         async for task in completed_tasks:
@@ -138,7 +163,8 @@ async def main(
 
         print(
             f"{TEXT_COLOR_CYAN}"
-            f"{num_tasks} tasks computed, total time: {datetime.now() - start_time}"
+            f"{num_tasks} tasks computed, "
+            f"total time: {timedelta(seconds=time.monotonic() - start_time)}"
             f"{TEXT_COLOR_DEFAULT}"
         )
 
@@ -146,6 +172,12 @@ async def main(
 if __name__ == "__main__":
     parser = build_parser("Render a Blender scene")
     parser.add_argument("--show-usage", action="store_true", help="show activity usage and cost")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=6,
+        help="the maximum number of providers to compute the tasks on in parallel",
+    )
     parser.add_argument(
         "--min-cpu-threads",
         type=int,
@@ -160,6 +192,7 @@ if __name__ == "__main__":
         main(
             subnet_tag=args.subnet_tag,
             min_cpu_threads=args.min_cpu_threads,
+            max_workers=args.max_workers,
             payment_driver=args.payment_driver,
             payment_network=args.payment_network,
             show_usage=args.show_usage,
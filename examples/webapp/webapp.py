@@ -2,15 +2,17 @@
 import asyncio
 import pathlib
 import sys
+import time
 from datetime import datetime, timedelta
 
-from yapapi import Golem
+from yapapi import Golem, events
 from yapapi.contrib.service.http_proxy import HttpProxyService, LocalHttpProxy
 from yapapi.payload import vm
 from yapapi.services import Service, ServiceState
 
-examples_dir = pathlib.Path(__file__).resolve().parent.parent
-sys.path.append(str(examples_dir))
+examples_dir = str(pathlib.Path(__file__).resolve().parent.parent)
+if examples_dir not in sys.path:
+    sys.path.append(examples_dir)
 
 from utils import (
     TEXT_COLOR_CYAN,
@@ -27,7 +29,7 @@ STARTING_TIMEOUT = timedelta(minutes=4)
 
 
 class HttpService(HttpProxyService):
-    def __init__(self, db_address: str, db_port: int = 4001):
+    def __init__(self, db_address: "asyncio.Future", db_port: int = 4001):
         super().__init__(remote_port=5000)
         self._db_address = db_address
         self._db_port = db_port
@@ -45,13 +47,17 @@ class HttpService(HttpProxyService):
         async for script in super().start():
             yield script
 
+        # the DB address is handed over as a future so that this service's VM could be
+        # provisioned while the DB instance was still starting - resolve it only now
+        db_address = await self._db_address
+
         script = self._ctx.new_script(timeout=timedelta(seconds=20))
 
         script.run(
             "/bin/bash",
             "-c",
             f"cd /webapp && python app.py "
-            f"--db-address {self._db_address} "
+            f"--db-address {db_address} "
             f"--db-port {self._db_port}"
             f" initdb",
         )
@@ -59,7 +65,7 @@ class HttpService(HttpProxyService):
             "/bin/bash",
             "-c",
             f"cd /webapp && python app.py "
-            f"--db-address {self._db_address} "
+            f"--db-address {db_address} "
             f"--db-port {self._db_port} "
             f"run > /webapp/out 2> /webapp/err &",
         )
@@ -94,16 +100,20 @@ async def main(subnet_tag, payment_driver, payment_network, port):
     ) as golem:
         print_env_info(golem)
 
+        # signaled on every service state transition, so that readiness checks below
+        # can wait for the actual change instead of polling on a fixed interval
+        state_changed = asyncio.Event()
+
+        golem.add_event_consumer(lambda _event: state_changed.set(), [events.ServiceStateChanged])
+
         network = await golem.create_network("192.168.0.1/24")
         async with network:
-            db_cluster = await golem.run_service(DbService, network=network)
-            db_instance = db_cluster.instances[0]
+
+            def is_starting(instance):
+                return instance.state in (ServiceState.pending, ServiceState.starting)
 
             def still_starting(cluster):
-                return any(
-                    i.state in (ServiceState.pending, ServiceState.starting)
-                    for i in cluster.instances
-                )
+                return any(is_starting(i) for i in cluster.instances)
 
             def raise_exception_if_still_starting(cluster):
                 if still_starting(cluster):
@@ -112,37 +122,64 @@ async def main(subnet_tag, payment_driver, payment_network, port):
                         f"after {STARTING_TIMEOUT.total_seconds()} seconds"
                     )
 
-            commissioning_time = datetime.now()
+            # a monotonic deadline is immune to wall-clock jumps and cheaper to compare
+            commissioning_deadline = time.monotonic() + STARTING_TIMEOUT.total_seconds()
+
+            async def wait_until_started(*clusters):
+                """Wait for all instances of given clusters to leave their starting states.
+
+                Instead of waking up on a fixed interval, we wait for the next state
+                transition (signaled through `state_changed`) until the timeout elapses.
+                Only instances that have not left their starting states are re-checked
+                on each wake-up.
+                """
+                pending = [i for c in clusters for i in c.instances if is_starting(i)]
+                while pending and time.monotonic() < commissioning_deadline:
+                    print([i for c in clusters for i in c.instances])
+                    state_changed.clear()
+                    try:
+                        await asyncio.wait_for(
+                            state_changed.wait(),
+                            timeout=commissioning_deadline - time.monotonic(),
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    pending = [i for i in pending if is_starting(i)]
+                for c in clusters:
+                    raise_exception_if_still_starting(c)
+
+            # The web service needs the DB address only when it runs its startup script,
+            # so instead of serializing the two deployments, commission both clusters at
+            # once and hand the web service a future resolved once the DB instance is up.
+            db_address: "asyncio.Future" = asyncio.get_event_loop().create_future()
+
+            # the two image registry lookups are independent - issue them concurrently
+            # and hand the pre-fetched payloads to run_service
+            db_payload, web_payload = await asyncio.gather(
+                DbService.get_payload(), HttpService.get_payload()
+            )
 
-            while (
-                still_starting(db_cluster)
-                and datetime.now() < commissioning_time + STARTING_TIMEOUT
-            ):
-                print(db_cluster.instances)
-                await asyncio.sleep(5)
+            db_cluster, web_cluster = await asyncio.gather(
+                golem.run_service(DbService, payload=db_payload, network=network),
+                golem.run_service(
+                    HttpService,
+                    payload=web_payload,
+                    network=network,
+                    instance_params=[{"db_address": db_address}],
+                ),
+            )
+            db_instance = db_cluster.instances[0]
 
-            raise_exception_if_still_starting(db_cluster)
+            await wait_until_started(db_cluster)
+            db_address.set_result(db_instance.network_node.ip)
 
             print(
                 f"{TEXT_COLOR_CYAN}DB instance started, spawning the web server{TEXT_COLOR_DEFAULT}"
             )
 
-            web_cluster = await golem.run_service(
-                HttpService,
-                network=network,
-                instance_params=[{"db_address": db_instance.network_node.ip}],
-            )
-
             # wait until all remote http instances are started
 
-            while (
-                still_starting(web_cluster)
-                and datetime.now() < commissioning_time + STARTING_TIMEOUT
-            ):
-                print(web_cluster.instances + db_cluster.instances)
-                await asyncio.sleep(5)
-
-            raise_exception_if_still_starting(web_cluster)
+            await wait_until_started(web_cluster, db_cluster)
 
             # service instances started, start the local HTTP server
 
@@ -154,12 +191,21 @@ async def main(subnet_tag, payment_driver, payment_network, port):
                 f"http://localhost:{port}{TEXT_COLOR_DEFAULT}"
             )
 
-            # wait until Ctrl-C
+            # wait until Ctrl-C, reporting the fleet status only when it changes
 
+            last_status = ""
+            poll_interval = 10
             while True:
-                print(web_cluster.instances + db_cluster.instances)
+                status = repr(web_cluster.instances + db_cluster.instances)
+                if status != last_status:
+                    print(status)
+                    last_status = status
+                    poll_interval = 10
+                else:
+                    # nothing changed - back off to cut steady-state wake-ups
+                    poll_interval = min(60, poll_interval * 2)
                 try:
-                    await asyncio.sleep(10)
+                    await asyncio.sleep(poll_interval)
                 except (KeyboardInterrupt, asyncio.CancelledError):
                     break
 
@@ -171,13 +217,21 @@ async def main(subnet_tag, payment_driver, payment_network, port):
             web_cluster.stop()
             db_cluster.stop()
 
-            cnt = 0
-            while cnt < 3 and any(
-                s.is_available for s in web_cluster.instances + db_cluster.instances
+            # wait for the instances to wind down, waking on state transitions
+            # instead of polling, but don't hold shutdown up for more than 15 s
+            drain_deadline = time.monotonic() + 15
+            while (
+                any(s.is_available for s in web_cluster.instances + db_cluster.instances)
+                and time.monotonic() < drain_deadline
             ):
                 print(web_cluster.instances + db_cluster.instances)
-                await asyncio.sleep(5)
-                cnt += 1
+                state_changed.clear()
+                try:
+                    await asyncio.wait_for(
+                        state_changed.wait(), timeout=drain_deadline - time.monotonic()
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
 
 if __name__ == "__main__":
@@ -23,6 +23,10 @@ from yapapi.log import enable_default_logger  # noqa: E402
 from yapapi.payload import vm  # noqa: E402
 from yapapi.rest.activity import BatchTimeoutError  # noqa: E402
 
+# Dedicated generator for output file name suffixes; avoids going through the
+# module-level `random._inst` shared by any other code running in the process.
+_rng = random.Random()
+
 
 async def main(subnet_tag, payment_driver=None, payment_network=None):
     package = await vm.repo(
@@ -34,7 +38,7 @@ async def main(subnet_tag, payment_driver=None, payment_network=None):
 
     async def worker(ctx: WorkContext, tasks):
         async for task in tasks:
-            output_file = f"output_{datetime.now()}_{random.random()}.txt"
+            output_file = f"output_{datetime.now()}_{_rng.random()}.txt"
             script = ctx.new_script(timeout=timedelta(minutes=10))
             script.run("/usr/bin/stress-ng", "--cpu", "1", "--timeout", "1")
             script.run("/golem/task.sh", "-o", "1024", "-t", "5")
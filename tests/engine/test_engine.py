@@ -1,4 +1,5 @@
 """Unit tests for `yapapi.engine` module."""
+import itertools
 from unittest.mock import Mock
 
 import pytest
@@ -30,48 +31,55 @@ def test_set_subnet_tag(default_subnet, subnet_arg, expected_subnet, monkeypatch
     assert golem.subnet_tag == expected_subnet
 
 
-def test_job_id(monkeypatch):
-    """Test automatic generation of job ids."""
-
-    used_ids = []
-
-    job_1 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock())
-    assert job_1.id
-    used_ids.append(job_1.id)
-
-    job_2 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock())
-    assert job_2.id
-    assert job_2.id not in used_ids
-    used_ids.append(job_2.id)
-
-    user_id_3 = f"{job_1.id}:{job_2.id}"
-    job_3 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock(), id=user_id_3)
-    assert job_3.id == user_id_3
-    used_ids.append(user_id_3)
-
-    job_4 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock())
-    assert job_4.id
-    assert job_4.id not in used_ids
-    used_ids.append(job_4.id)
-
-    # Assuming generated ids are just numbers: pass str(N+1) as the user-specified id,
-    # where N is the numeric value of the last autogenerated id, and make sure the next
-    # autogenerated id is not str(N+1) (a duplicate).
-    numeric_ids = set()
-    for id in used_ids:
-        try:
-            numeric_ids.add(int(id))
-        except ValueError:
-            pass
-    if numeric_ids:
-        max_id = max(numeric_ids)
-        next_id = str(max_id + 1)
-        job_5 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock(), id=next_id)
-        used_ids.append(job_5.id)
-        job_6 = Job(engine=Mock(), expiration_time=Mock(), payload=Mock())
-        assert job_6.id not in used_ids
-
-    # Passing an already used id should raise a ValueError
+@pytest.fixture
+def fresh_job_ids(monkeypatch):
+    """Reset `Job`'s class-level id registry so each test case starts from a clean slate."""
+    monkeypatch.setattr(Job, "_generated_job_ids", (str(n) for n in itertools.count(1)))
+    monkeypatch.setattr(Job, "_used_job_ids", set())
+
+
+def new_job(id=None):
+    return Job(engine=Mock(), expiration_time=Mock(), payload=Mock(), id=id)
+
+
+@pytest.mark.usefixtures("fresh_job_ids")
+def test_job_id_autogenerated_unique():
+    """Autogenerated job ids are non-empty and unique."""
+
+    jobs = [new_job() for _ in range(3)]
+    assert all(job.id for job in jobs)
+    assert len({job.id for job in jobs}) == len(jobs)
+
+
+@pytest.mark.usefixtures("fresh_job_ids")
+def test_job_id_user_provided():
+    """A non-colliding user-provided id is used verbatim."""
+
+    job_1 = new_job()
+    user_id = f"{job_1.id}:custom"
+    assert new_job(id=user_id).id == user_id
+
+
+@pytest.mark.usefixtures("fresh_job_ids")
+def test_job_id_autogen_skips_used_id():
+    """Autogeneration never yields an id that was already taken by a user-provided one.
+
+    Assuming generated ids are just numbers: pass str(N+1) as the user-specified id,
+    where N is the numeric value of the last autogenerated id, and make sure the next
+    autogenerated id is not str(N+1) (a duplicate).
+    """
+
+    job_1 = new_job()
+    job_2 = new_job(id=str(int(job_1.id) + 1))
+    job_3 = new_job()
+    assert job_3.id not in (job_1.id, job_2.id)
+
+
+@pytest.mark.parametrize("user_id", [None, "my-job"])
+@pytest.mark.usefixtures("fresh_job_ids")
+def test_job_id_duplicate_raises(user_id):
+    """Passing an already used id raises a ValueError."""
+
+    job_1 = new_job(id=user_id)
     with pytest.raises(ValueError):
-        duplicate_id = used_ids[0]
-        Job(engine=Mock(), expiration_time=Mock(), payload=Mock(), id=duplicate_id)
+        new_job(id=job_1.id)